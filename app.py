@@ -1,14 +1,149 @@
-import joblib
-import requests
-import json
-from flask import Flask, request, render_template
 import os
 
+# Cooperative I/O via gevent monkey-patching, applied before anything else is
+# imported. Required under gunicorn --preload (see README), since the master
+# imports the app before the gevent worker patches.
+if os.getenv("USE_GEVENT") == "1":
+    from gevent import monkey
+    monkey.patch_all()
+
+import fastjsonschema
+import httpx
+import joblib
+import logging
+import numpy as np
+import onnxruntime as ort
+import orjson
+import re
+import threading
+from email.utils import parsedate_to_datetime
+from math import pi
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from collections import OrderedDict
+from diskcache import Cache
+from flask import Flask, request, render_template, jsonify
+from flask_compress import Compress
+
+# Logging; set LOG_LEVEL=DEBUG to trace individual predictions
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING"))
+log = logging.getLogger(__name__)
+
 # Initialize Flask app
 app = Flask(__name__)
 
-# Load the Random Forest model
-random_forest_model = joblib.load('random_forest_model.pkl')
+# Compress responses (brotli preferred, gzip fallback)
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_MIN_SIZE"] = 1024
+Compress(app)
+
+# Templates are compiled once at import. In debug mode they are looked up by
+# name on every render instead, so edits to the files are picked up.
+app.config["TEMPLATES_AUTO_RELOAD"] = os.getenv("FLASK_DEBUG") == "1"
+app.jinja_env.auto_reload = app.config["TEMPLATES_AUTO_RELOAD"]
+if app.config["TEMPLATES_AUTO_RELOAD"]:
+    _TMPL_INDEX, _TMPL_INFO, _TMPL_RESULT = 'index.html', 'info.html', 'result.html'
+else:
+    _TMPL_INDEX = app.jinja_env.get_template('index.html')
+    _TMPL_INFO = app.jinja_env.get_template('info.html')
+    _TMPL_RESULT = app.jinja_env.get_template('result.html')
+
+def _flatten_forest(forest):
+    """
+    Pack the trees of a binary RandomForestClassifier into padded
+    (n_estimators, max_nodes) arrays for the compiled traversal kernel
+    """
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    shape = (len(trees), max(tree.node_count for tree in trees))
+
+    features = np.zeros(shape, dtype=np.int16)
+    # Thresholds stay float64, as in sklearn, so split decisions match exactly
+    thresholds = np.zeros(shape, dtype=np.float64)
+    left = np.full(shape, -1, dtype=np.int32)
+    right = np.full(shape, -1, dtype=np.int32)
+    leaf_value = np.zeros(shape, dtype=np.float64)
+
+    for e, tree in enumerate(trees):
+        n = tree.node_count
+        features[e, :n] = tree.feature
+        thresholds[e, :n] = tree.threshold
+        left[e, :n] = tree.children_left
+        right[e, :n] = tree.children_right
+        values = tree.value[:, 0, :]
+        leaf_value[e, :n] = values[:, 1] / values.sum(axis=1)
+
+    return features, thresholds, left, right, leaf_value
+
+def _forest_predict(X, features, thresholds, left, right, leaf_value):
+    """
+    Majority vote over averaged class-1 probabilities, as RandomForestClassifier.predict.
+    Compiled with Numba when the joblib model is used (see below).
+    """
+    n_estimators = features.shape[0]
+    out = np.empty(X.shape[0], dtype=np.int64)
+    for i in range(X.shape[0]):
+        total = 0.0
+        for e in range(n_estimators):
+            node = 0
+            while left[e, node] != -1:
+                if X[i, features[e, node]] <= thresholds[e, node]:
+                    node = left[e, node]
+                else:
+                    node = right[e, node]
+            total += leaf_value[e, node]
+        out[i] = 1 if total > 0.5 * n_estimators else 0
+    return out
+
+# Load the Random Forest model, preferring the ONNX export (see convert_model.py)
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", "rf.onnx")
+_forest_arrays = None
+
+if os.path.exists(ONNX_MODEL_PATH):
+    _sess_options = ort.SessionOptions()
+    _sess_options.intra_op_num_threads = 1
+    _sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    onnx_session = ort.InferenceSession(ONNX_MODEL_PATH, sess_options=_sess_options, providers=["CPUExecutionProvider"])
+    _onnx_input_name = onnx_session.get_inputs()[0].name
+    random_forest_model = None
+else:
+    onnx_session = None
+    # The pickle is an uncompressed joblib dump, so its arrays can be memory-mapped
+    random_forest_model = joblib.load('random_forest_model.pkl', mmap_mode='r')
+    if random_forest_model.n_outputs_ == 1 and len(random_forest_model.classes_) == 2:
+        # Numba is only needed without the ONNX export
+        from numba import njit
+        _forest_predict = njit(cache=True)(_forest_predict)
+        _forest_arrays = _flatten_forest(random_forest_model)
+        # Compile (or load the cached kernel) at import rather than on the first request
+        _forest_predict(np.zeros((1, 4), dtype=np.float32), *_forest_arrays)
+
+# Per-thread input buffer reused across predictions
+_input_buffer = threading.local()
+
+def _infer(X):
+    """
+    Run the Random Forest model on a float32 array of shape (n_samples, 4)
+    """
+    # Neither backend treats NaN/infinity the way sklearn's predict does, so
+    # reject them as sklearn itself would
+    if not np.isfinite(X).all():
+        raise ValueError("Input X contains infinity or NaN.")
+    if onnx_session is not None:
+        return onnx_session.run(None, {_onnx_input_name: X})[0]
+    if _forest_arrays is not None:
+        return random_forest_model.classes_.take(_forest_predict(X, *_forest_arrays))
+    return random_forest_model.predict(X)
+
+def predict_maintenance(air_temp, process_temp, rotational_speed, torque):
+    """
+    Run the Random Forest model on a single set of machine parameters
+    """
+    x = getattr(_input_buffer, "x", None)
+    if x is None:
+        x = _input_buffer.x = np.empty((1, 4), dtype=np.float32)
+    x[0] = (air_temp, process_temp, rotational_speed, torque)
+    return int(_infer(x)[0])
 
 # Groq API configuration
 
@@ -16,268 +151,465 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 
-def get_ai_recommendations(air_temp, process_temp, rotational_speed, torque, prediction_result):
+# Pooled HTTP/2 client so concurrent Groq calls are multiplexed over reused connections
+_client = httpx.Client(
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    ),
+    timeout=30,  # per attempt, capped by AI_REQUEST_BUDGET
+    headers={
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json"
+    }
+)
+
+# Transient Groq API statuses retried with exponential backoff, or after the
+# server's Retry-After delay when it asks for longer
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_RETRY_ATTEMPTS = 3
+_RETRY_BACKOFF = 0.3  # seconds
+
+# Total time one Groq lookup may take, retries included; single-flight
+# followers wait on the leader for the same budget
+AI_REQUEST_BUDGET = int(os.getenv("AI_REQUEST_BUDGET", 60))  # seconds
+
+def _retry_after(response):
     """
-    Get AI-powered maintenance recommendations based on machine parameters
+    Seconds the server asked us to wait via Retry-After, or 0 if absent/invalid
     """
+    value = response.headers.get("retry-after")
+    if value is None:
+        return 0
     try:
-        # Create context-aware prompt
-        maintenance_status = "requires maintenance" if prediction_result == 1 else "is in good condition"
-        
-        prompt = f"""
-        As an industrial maintenance expert, analyze these machine parameters and provide 4 specific, actionable maintenance recommendations:
-        
-        Machine Status: {maintenance_status}
-        - Air Temperature: {air_temp} K ({air_temp - 273.15:.1f}°C)
-        - Process Temperature: {process_temp} K ({process_temp - 273.15:.1f}°C)
-        - Rotational Speed: {rotational_speed} RPM
-        - Torque: {torque} Nm
-        
-        Consider these factors in your analysis:
-        - Temperature differentials and thermal stress
-        - Rotational speed vs torque relationship
-        - Wear patterns and lubrication needs
-        - Energy efficiency optimization
-        - Predictive maintenance strategies
-        - Safety protocols and compliance
-        
-        Provide exactly 4 recommendations in this JSON format:
-        {{
-            "recommendations": [
-                {{
-                    "title": "Specific Action Title",
-                    "description": "Detailed explanation of what to do and why",
-                    "icon": "fas fa-relevant-icon",
-                    "priority": "high/medium/low"
-                }}
-            ]
-        }}
-        
-        Make recommendations specific to the actual parameter values, not generic advice. Include a mix of immediate actions, preventive measures, monitoring suggestions, and optimization opportunities.
-        """
-        
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": "mixtral-8x7b-32768",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are an expert industrial maintenance engineer with 20+ years of experience in predictive maintenance systems."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.3,
-            "max_tokens": 1200
-        }
-        
-        response = requests.post(GROQ_API_URL, headers=headers, json=data, timeout=30)
-        
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content']
-            
-            # Try to extract JSON from the response
-            try:
-                # Find JSON in the response
-                start_idx = content.find('{')
-                end_idx = content.rfind('}') + 1
-                json_str = content[start_idx:end_idx]
-                recommendations_data = json.loads(json_str)
-                return recommendations_data['recommendations']
-            except:
-                # Fallback to default recommendations if JSON parsing fails
-                return get_default_recommendations(air_temp, process_temp, rotational_speed, torque, prediction_result)
-        else:
-            print(f"Groq API error: {response.status_code}")
-            return get_default_recommendations(air_temp, process_temp, rotational_speed, torque, prediction_result)
-            
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return 0
+
+def _post_groq(body):
+    """
+    POST a serialized payload to the Groq API, retrying transient error statuses
+    within AI_REQUEST_BUDGET
+    """
+    deadline = time.monotonic() + AI_REQUEST_BUDGET
+    for attempt in range(_RETRY_ATTEMPTS + 1):
+        remaining = deadline - time.monotonic()
+        response = _client.post(GROQ_API_URL, content=body, timeout=min(30, remaining))
+        if response.status_code not in _RETRY_STATUSES or attempt == _RETRY_ATTEMPTS:
+            return response
+        delay = max(_RETRY_BACKOFF * 2 ** attempt, _retry_after(response))
+        # Give up rather than retry with no time left for the next attempt
+        if delay >= deadline - time.monotonic() - 1:
+            return response
+        time.sleep(delay)
+
+# AI recommendation cache: in-process LRU backed by an on-disk store shared
+# across worker processes and restarts
+AI_CACHE_DIR = os.getenv("AI_CACHE_DIR", "ai_cache")
+AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", 24 * 60 * 60))  # seconds
+
+ai_cache = Cache(AI_CACHE_DIR)
+
+# Background AI recommendation jobs: /predict renders default recommendations
+# immediately and the result page polls /recommendations/<job_id> for the AI ones.
+# Job states live in ai_cache so any worker process can answer the poll, and
+# expire after AI_JOB_TTL.
+AI_JOB_TTL = int(os.getenv("AI_JOB_TTL", 5 * 60))  # seconds
+
+_executor = ThreadPoolExecutor(max_workers=16)
+
+def _ai_job_key(job_id):
+    return ("job", job_id)
+
+def _store_ai_job_result(job_id, future):
+    """
+    Record a finished job's outcome where every worker can read it
+    """
+    try:
+        state = {"status": "done", "recs": future.result()}
     except Exception as e:
-        print(f"Error getting AI recommendations: {str(e)}")
-        return get_default_recommendations(air_temp, process_temp, rotational_speed, torque, prediction_result)
+        log.error("AI recommendation job %s failed: %s", job_id, e)
+        state = {"status": "error"}
+    ai_cache.set(_ai_job_key(job_id), state, expire=AI_JOB_TTL)
 
-def get_default_recommendations(air_temp, process_temp, rotational_speed, torque, prediction_result):
+def _submit_ai_job(air_temp, process_temp, rotational_speed, torque, prediction_result):
     """
-    Fallback function to provide context-aware recommendations based on parameter analysis
+    Start fetching AI recommendations in the background and return the job id
     """
-    recommendations = []
-    
-    # Temperature analysis
-    temp_diff = process_temp - air_temp
-    air_temp_c = air_temp - 273.15
-    process_temp_c = process_temp - 273.15
+    job_id = uuid.uuid4().hex
+    # Mark the job pending before it can finish and write its result
+    ai_cache.set(_ai_job_key(job_id), {"status": "pending"}, expire=AI_JOB_TTL)
+    future = _executor.submit(get_ai_recommendations, air_temp, process_temp, rotational_speed, torque, prediction_result)
+    future.add_done_callback(lambda f: _store_ai_job_result(job_id, f))
+    return job_id
+
+def _ai_cache_key(air_temp, process_temp, rotational_speed, torque, prediction_result):
+    """
+    Quantize machine parameters so near-identical readings share a cache entry
+    """
+    return (
+        round(air_temp, 1),
+        round(process_temp, 1),
+        round(rotational_speed / 50) * 50,
+        round(torque / 2) * 2,
+        int(prediction_result)
+    )
+
+# In-process LRU tier: key -> (expires_at, recommendations), expiring with the disk entry
+AI_MEMORY_CACHE_SIZE = 1024
+
+_ai_memory_cache = OrderedDict()
+_ai_memory_lock = threading.Lock()
+
+def _ai_recs_cached(key):
+    """
+    Return AI recommendations for a quantized parameter key, querying Groq only
+    when neither the in-process nor the on-disk cache has a live entry
+    """
+    now = time.time()
+    with _ai_memory_lock:
+        entry = _ai_memory_cache.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _ai_memory_cache.move_to_end(key)
+                return entry[1]
+            del _ai_memory_cache[key]
+
+    recommendations, expires_at = ai_cache.get(key, expire_time=True)
+    if recommendations is None:
+        recommendations = tuple(_request_ai_recommendations(*key))
+        ai_cache.set(key, recommendations, expire=AI_CACHE_TTL)
+        expires_at = now + AI_CACHE_TTL
+
+    with _ai_memory_lock:
+        _ai_memory_cache[key] = (expires_at, recommendations)
+        _ai_memory_cache.move_to_end(key)
+        if len(_ai_memory_cache) > AI_MEMORY_CACHE_SIZE:
+            _ai_memory_cache.popitem(last=False)
+    return recommendations
+
+# In-flight AI lookups by cache key, so concurrent identical requests share
+# a single upstream call
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def _ai_recs_single_flight(key):
+    """
+    Resolve a cache key, waiting on an identical in-flight lookup if one exists
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+
+    if not leader:
+        return future.result(timeout=AI_REQUEST_BUDGET)
+
+    try:
+        future.set_result(_ai_recs_cached(key))
+    except Exception as e:
+        future.set_exception(e)
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+    return future.result()
+
+# When to ask Groq instead of using the default recommendations:
+# "always", "boundary" (only for readings near a bucket threshold) or "never"
+AI_CONFIDENCE_MODES = ("always", "boundary", "never")
+AI_CONFIDENCE_MODE = os.getenv("AI_CONFIDENCE_MODE", "boundary")
+if AI_CONFIDENCE_MODE not in AI_CONFIDENCE_MODES:
+    raise ValueError(f"AI_CONFIDENCE_MODE must be one of {', '.join(AI_CONFIDENCE_MODES)}, got {AI_CONFIDENCE_MODE!r}")
+AI_BOUNDARY_MARGIN = 0.1  # fraction of each threshold
+
+def _is_boundary(air_temp, process_temp, rotational_speed, torque):
+    """
+    Check whether any parameter lies close to a threshold used by get_default_recommendations
+    """
+    readings = (
+        (process_temp - air_temp, TEMP_DIFF_HIGH),
+        (process_temp - 273.15, PROCESS_TEMP_HIGH),
+        (rotational_speed, SPEED_HIGH),
+        (rotational_speed, SPEED_LOW),
+        (torque, TORQUE_HIGH),
+        (torque, TORQUE_LOW)
+    )
+    return any(abs(value - threshold) <= AI_BOUNDARY_MARGIN * threshold for value, threshold in readings)
+
+def _should_query_ai(air_temp, process_temp, rotational_speed, torque):
+    """
+    Decide whether the default recommendations are confident enough to skip Groq
+    """
+    if AI_CONFIDENCE_MODE == "always":
+        return True
+    if AI_CONFIDENCE_MODE == "never":
+        return False
+    return _is_boundary(air_temp, process_temp, rotational_speed, torque)
+
+def get_ai_recommendations(air_temp, process_temp, rotational_speed, torque, prediction_result):
+    """
+    Get AI-powered maintenance recommendations based on machine parameters
+    """
+    if not _should_query_ai(air_temp, process_temp, rotational_speed, torque):
+        return get_default_recommendations(air_temp, process_temp, rotational_speed, torque, prediction_result)
+
+    key = _ai_cache_key(air_temp, process_temp, rotational_speed, torque, prediction_result)
+    try:
+        return list(_ai_recs_single_flight(key))
+    except (httpx.HTTPError, ValueError, LookupError, FutureTimeoutError) as e:
+        log.warning("Error getting AI recommendations: %s", e)
+        return get_default_recommendations(air_temp, process_temp, rotational_speed, torque, prediction_result)
+
+# Prompt and request payload templates for the Groq API
+_PROMPT_TMPL = """
+    As an industrial maintenance expert, analyze these machine parameters and provide 4 specific, actionable maintenance recommendations:
     
-    if temp_diff > 15:  # High temperature differential
-        recommendations.append({
-            "title": "Cooling System Optimization",
-            "description": f"Temperature differential of {temp_diff:.1f}K detected. Check cooling efficiency, clean heat exchangers, and verify coolant flow rates to prevent thermal stress.",
-            "icon": "fas fa-snowflake",
-            "priority": "high"
-        })
-    elif process_temp_c > 50:  # High process temperature
-        recommendations.append({
-            "title": "Temperature Monitoring Enhancement",
-            "description": f"Process temperature at {process_temp_c:.1f}°C requires attention. Implement continuous thermal monitoring and consider heat dissipation improvements.",
-            "icon": "fas fa-thermometer-half",
-            "priority": "medium"
-        })
-    else:
-        recommendations.append({
-            "title": "Thermal Stability Maintenance",
-            "description": f"Current thermal conditions are stable. Monitor temperature trends and maintain cooling system efficiency to prevent future overheating.",
-            "icon": "fas fa-temperature-low",
-            "priority": "low"
-        })
+    Machine Status: {status}
+    - Air Temperature: {air_temp} K ({air_temp_c:.1f}°C)
+    - Process Temperature: {process_temp} K ({process_temp_c:.1f}°C)
+    - Rotational Speed: {rotational_speed} RPM
+    - Torque: {torque} Nm
     
-    # Speed and torque analysis
-    power_estimate = (torque * rotational_speed * 2 * 3.14159) / 60000  # Approximate power in kW
+    Consider these factors in your analysis:
+    - Temperature differentials and thermal stress
+    - Rotational speed vs torque relationship
+    - Wear patterns and lubrication needs
+    - Energy efficiency optimization
+    - Predictive maintenance strategies
+    - Safety protocols and compliance
     
-    if rotational_speed > 2000:  # High speed operation
-        recommendations.append({
-            "title": "High-Speed Bearing Maintenance",
-            "description": f"Operating at {rotational_speed} RPM requires premium lubrication. Schedule bearing inspection and use high-speed compatible lubricants.",
-            "icon": "fas fa-tachometer-alt",
-            "priority": "high"
-        })
-    elif rotational_speed < 1000:  # Low speed, check for efficiency
-        recommendations.append({
-            "title": "Low-Speed Operation Analysis",
-            "description": f"Low speed operation at {rotational_speed} RPM may indicate efficiency issues. Check for mechanical resistance and alignment problems.",
-            "icon": "fas fa-search",
-            "priority": "medium"
-        })
-    else:
-        recommendations.append({
-            "title": "Optimal Speed Range Monitoring",
-            "description": f"Current speed of {rotational_speed} RPM is within normal range. Continue monitoring for speed variations and maintain consistent operation.",
-            "icon": "fas fa-gauge",
-            "priority": "low"
-        })
+    Provide exactly 4 recommendations in this JSON format:
+    {{
+        "recommendations": [
+            {{
+                "title": "Specific Action Title",
+                "description": "Detailed explanation of what to do and why",
+                "icon": "fas fa-relevant-icon",
+                "priority": "high/medium/low"
+            }}
+        ]
+    }}
     
-    if torque > 50:  # High torque
-        recommendations.append({
-            "title": "High-Torque Component Inspection",
-            "description": f"High torque load of {torque} Nm detected. Inspect coupling alignment, check for mechanical stress, and verify fastener torque specifications.",
-            "icon": "fas fa-wrench",
-            "priority": "high"
-        })
-    elif torque < 20:  # Low torque might indicate slipping
-        recommendations.append({
-            "title": "Drive System Verification",
-            "description": f"Low torque reading of {torque} Nm may indicate slipping or reduced load transfer. Check belt tension and coupling integrity.",
-            "icon": "fas fa-tools",
-            "priority": "medium"
-        })
-    else:
-        recommendations.append({
-            "title": "Torque Load Optimization",
-            "description": f"Current torque of {torque} Nm is within acceptable range. Monitor for load variations and optimize power transfer efficiency.",
-            "icon": "fas fa-balance-scale",
-            "priority": "low"
-        })
+    Make recommendations specific to the actual parameter values, not generic advice. Include a mix of immediate actions, preventive measures, monitoring suggestions, and optimization opportunities.
+    """
+
+_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are an expert industrial maintenance engineer with 20+ years of experience in predictive maintenance systems."
+}
+
+_PAYLOAD_TMPL = {
+    "model": "mixtral-8x7b-32768",
+    "temperature": 0.3,
+    "max_tokens": 1200
+}
+
+# Outermost {...} span of the model's reply
+_JSON_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# Shape the model's reply must have; invalid replies raise JsonSchemaException (a ValueError)
+_validate_recommendations = fastjsonschema.compile({
+    "type": "object",
+    "properties": {
+        "recommendations": {
+            "type": "array",
+            "minItems": 4,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "description": {"type": "string"},
+                    "icon": {"type": "string"},
+                    "priority": {"type": "string"}
+                },
+                "required": ["title", "description", "icon", "priority"]
+            }
+        }
+    },
+    "required": ["recommendations"]
+})
+
+def _request_ai_recommendations(air_temp, process_temp, rotational_speed, torque, prediction_result):
+    """
+    Query the Groq API for recommendations; raises on any failure so that
+    fallback results never end up in the cache
+    """
+    # Create context-aware prompt
+    prompt = _PROMPT_TMPL.format(
+        status="requires maintenance" if prediction_result == 1 else "is in good condition",
+        air_temp=air_temp,
+        air_temp_c=air_temp - 273.15,
+        process_temp=process_temp,
+        process_temp_c=process_temp - 273.15,
+        rotational_speed=rotational_speed,
+        torque=torque
+    )
     
-    # Maintenance prediction specific recommendations
-    if prediction_result == 1:  # Maintenance required
-        recommendations.append({
-            "title": "Immediate Maintenance Protocol",
-            "description": "AI model indicates maintenance required. Schedule immediate inspection focusing on wear components, lubrication levels, and alignment checks.",
-            "icon": "fas fa-exclamation-triangle",
-            "priority": "high"
-        })
-    else:  # No maintenance required
-        recommendations.append({
-            "title": "Preventive Maintenance Scheduling",
-            "description": "Machine is operating normally. Maintain current maintenance schedule and monitor parameter trends for early detection of changes.",
-            "icon": "fas fa-calendar-check",
-            "priority": "low"
-        })
+    data = {**_PAYLOAD_TMPL, "messages": [_SYSTEM_MESSAGE, {"role": "user", "content": prompt}]}
     
-    # Always add these comprehensive recommendations to reach 4
-    additional_recommendations = [
-        {
-            "title": "Vibration Analysis Implementation",
-            "description": "Conduct comprehensive vibration analysis to detect early signs of mechanical wear, misalignment, or bearing degradation before they cause failures.",
-            "icon": "fas fa-wave-square",
-            "priority": "medium"
-        },
-        {
-            "title": "Lubrication Schedule Optimization",
-            "description": "Review and optimize lubrication intervals based on current operating conditions, load factors, and manufacturer specifications for maximum efficiency.",
-            "icon": "fas fa-oil-can",
-            "priority": "medium"
-        },
-        {
-            "title": "Performance Trending & Analytics",
-            "description": "Establish comprehensive baseline performance metrics and implement advanced trend analysis for predictive maintenance optimization.",
-            "icon": "fas fa-chart-line",
-            "priority": "low"
-        },
-        {
-            "title": "Energy Efficiency Audit",
-            "description": f"With estimated power output of {power_estimate:.2f} kW, conduct energy efficiency audit to identify optimization opportunities and reduce operational costs.",
-            "icon": "fas fa-bolt",
-            "priority": "medium"
-        },
-        {
-            "title": "Safety Protocol Review",
-            "description": "Review current safety protocols and emergency procedures to ensure compliance with latest industrial safety standards and regulations.",
-            "icon": "fas fa-shield-alt",
-            "priority": "medium"
-        },
-        {
-            "title": "Sensor Calibration Check",
-            "description": "Verify accuracy of temperature, speed, and torque sensors through calibration checks to ensure reliable data for predictive maintenance.",
-            "icon": "fas fa-adjust",
-            "priority": "low"
-        }
-    ]
+    response = _post_groq(orjson.dumps(data))
     
-    # Ensure we have exactly 4 recommendations
-    while len(recommendations) < 4:
-        # Add from additional recommendations pool
-        for rec in additional_recommendations:
-            if rec not in recommendations and len(recommendations) < 4:
-                recommendations.append(rec)
-                break
+    if response.status_code != 200:
+        raise httpx.HTTPStatusError(f"Groq API error: {response.status_code}", request=response.request, response=response)
+
+    result = orjson.loads(response.content)
+    # Malformed upstream replies take the fallback path (ValueError), not the error path
+    try:
+        content = result['choices'][0]['message']['content']
+    except (TypeError, LookupError):
+        raise ValueError("Unexpected Groq response structure") from None
     
-    # If we have more than 4, prioritize by priority level
-    if len(recommendations) > 4:
-        high_priority = [r for r in recommendations if r["priority"] == "high"]
-        medium_priority = [r for r in recommendations if r["priority"] == "medium"]
-        low_priority = [r for r in recommendations if r["priority"] == "low"]
-        
-        # Select 4 recommendations with priority distribution
-        final_recommendations = []
-        
-        # Add high priority first (max 2)
-        final_recommendations.extend(high_priority[:2])
-        
-        # Add medium priority to fill remaining slots
-        remaining_slots = 4 - len(final_recommendations)
-        final_recommendations.extend(medium_priority[:remaining_slots])
-        
-        # Fill any remaining slots with low priority
-        remaining_slots = 4 - len(final_recommendations)
-        if remaining_slots > 0:
-            final_recommendations.extend(low_priority[:remaining_slots])
-        
-        recommendations = final_recommendations
+    if not isinstance(content, str):
+        raise ValueError("Groq response has no text content")
     
-    return recommendations[:4]
+    # Find JSON in the response
+    match = _JSON_RE.search(content)
+    if match is None:
+        raise ValueError("No JSON object found in Groq response")
+    recommendations_data = orjson.loads(match.group(0))
+    _validate_recommendations(recommendations_data)
+    return recommendations_data['recommendations'][:4]
+
+# Static fallback recommendations, grouped by the parameter they respond to.
+# Descriptions are templates filled from the machine parameters at call time.
+_TEMP_RECS = (
+    {  # High temperature differential
+        "title": "Cooling System Optimization",
+        "description": "Temperature differential of {temp_diff:.1f}K detected. Check cooling efficiency, clean heat exchangers, and verify coolant flow rates to prevent thermal stress.",
+        "icon": "fas fa-snowflake",
+        "priority": "high"
+    },
+    {  # High process temperature
+        "title": "Temperature Monitoring Enhancement",
+        "description": "Process temperature at {process_temp_c:.1f}°C requires attention. Implement continuous thermal monitoring and consider heat dissipation improvements.",
+        "icon": "fas fa-thermometer-half",
+        "priority": "medium"
+    },
+    {
+        "title": "Thermal Stability Maintenance",
+        "description": "Current thermal conditions are stable. Monitor temperature trends and maintain cooling system efficiency to prevent future overheating.",
+        "icon": "fas fa-temperature-low",
+        "priority": "low"
+    }
+)
+
+_SPEED_RECS = (
+    {  # High speed operation
+        "title": "High-Speed Bearing Maintenance",
+        "description": "Operating at {rotational_speed} RPM requires premium lubrication. Schedule bearing inspection and use high-speed compatible lubricants.",
+        "icon": "fas fa-tachometer-alt",
+        "priority": "high"
+    },
+    {  # Low speed, check for efficiency
+        "title": "Low-Speed Operation Analysis",
+        "description": "Low speed operation at {rotational_speed} RPM may indicate efficiency issues. Check for mechanical resistance and alignment problems.",
+        "icon": "fas fa-search",
+        "priority": "medium"
+    },
+    {
+        "title": "Optimal Speed Range Monitoring",
+        "description": "Current speed of {rotational_speed} RPM is within normal range. Continue monitoring for speed variations and maintain consistent operation.",
+        "icon": "fas fa-gauge",
+        "priority": "low"
+    }
+)
+
+_TORQUE_RECS = (
+    {  # High torque
+        "title": "High-Torque Component Inspection",
+        "description": "High torque load of {torque} Nm detected. Inspect coupling alignment, check for mechanical stress, and verify fastener torque specifications.",
+        "icon": "fas fa-wrench",
+        "priority": "high"
+    },
+    {  # Low torque might indicate slipping
+        "title": "Drive System Verification",
+        "description": "Low torque reading of {torque} Nm may indicate slipping or reduced load transfer. Check belt tension and coupling integrity.",
+        "icon": "fas fa-tools",
+        "priority": "medium"
+    },
+    {
+        "title": "Torque Load Optimization",
+        "description": "Current torque of {torque} Nm is within acceptable range. Monitor for load variations and optimize power transfer efficiency.",
+        "icon": "fas fa-balance-scale",
+        "priority": "low"
+    }
+)
+
+# Indexed by the model's prediction result
+_PRED_RECS = (
+    {  # No maintenance required
+        "title": "Preventive Maintenance Scheduling",
+        "description": "Machine is operating normally. Maintain current maintenance schedule and monitor parameter trends for early detection of changes.",
+        "icon": "fas fa-calendar-check",
+        "priority": "low"
+    },
+    {  # Maintenance required
+        "title": "Immediate Maintenance Protocol",
+        "description": "AI model indicates maintenance required. Schedule immediate inspection focusing on wear components, lubrication levels, and alignment checks.",
+        "icon": "fas fa-exclamation-triangle",
+        "priority": "high"
+    }
+)
+
+# Converts torque (Nm) times rotational speed (RPM) to power in kW
+_RPM_NM_TO_KW = 2 * pi / 60000
+
+# Parameter thresholds separating the default recommendation buckets
+TEMP_DIFF_HIGH = 15  # K
+PROCESS_TEMP_HIGH = 50  # °C
+SPEED_HIGH = 2000  # RPM
+SPEED_LOW = 1000  # RPM
+TORQUE_HIGH = 50  # Nm
+TORQUE_LOW = 20  # Nm
+
+def get_default_recommendations(air_temp, process_temp, rotational_speed, torque, prediction_result,
+                                temp_diff=None, process_temp_c=None):
+    """
+    Fallback function to provide context-aware recommendations based on parameter analysis.
+    Callers that already derived temp_diff and process_temp_c can pass them in.
+    """
+    # Temperature analysis
+    if temp_diff is None:
+        temp_diff = process_temp - air_temp
+    if process_temp_c is None:
+        process_temp_c = process_temp - 273.15
+    temp_idx = 0 if temp_diff > TEMP_DIFF_HIGH else 1 if process_temp_c > PROCESS_TEMP_HIGH else 2
+
+    # Speed and torque analysis
+    speed_idx = 0 if rotational_speed > SPEED_HIGH else 1 if rotational_speed < SPEED_LOW else 2
+    torque_idx = 0 if torque > TORQUE_HIGH else 1 if torque < TORQUE_LOW else 2
+
+    values = {
+        "temp_diff": temp_diff,
+        "process_temp_c": process_temp_c,
+        "rotational_speed": rotational_speed,
+        "torque": torque
+    }
+
+    # One recommendation per parameter group plus one for the prediction
+    return [
+        {**rec, "description": rec["description"].format_map(values)}
+        for rec in (
+            _TEMP_RECS[temp_idx],
+            _SPEED_RECS[speed_idx],
+            _TORQUE_RECS[torque_idx],
+            _PRED_RECS[1 if prediction_result == 1 else 0]
+        )
+    ]
 
 @app.route('/info')
 def info():
-    return render_template('info.html')
+    return render_template(_TMPL_INFO)
 
 @app.route('/')
 def home():
-    return render_template('index.html')
+    return render_template(_TMPL_INDEX)
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -288,33 +620,43 @@ def predict():
         feature_3 = float(request.form['feature_3'])  # Rotational Speed
         feature_4 = float(request.form['feature_4'])  # Torque
 
-        # Print the features for debugging
-        print(f"Features: {feature_1}, {feature_2}, {feature_3}, {feature_4}")
+        log.debug("Features: %s, %s, %s, %s", feature_1, feature_2, feature_3, feature_4)
 
         # Make prediction using the Random Forest model
-        result = random_forest_model.predict([[feature_1, feature_2, feature_3, feature_4]])[0]
+        result = predict_maintenance(feature_1, feature_2, feature_3, feature_4)
         
-        # Print the result for debugging
-        print(f"Prediction Result: {result}")
+        log.debug("Prediction Result: %s", result)
 
         # Convert the prediction result to a readable format
         prediction_text = "Maintenance Required" if result == 1 else "No Maintenance Required"
         
-        # Get AI-powered recommendations (now returns 4)
-        recommendations = get_ai_recommendations(feature_1, feature_2, feature_3, feature_4, result)
+        # Derived parameters shared by the recommendations and the template
+        air_temp_c = feature_1 - 273.15
+        process_temp_c = feature_2 - 273.15
+        temp_diff = feature_2 - feature_1
+        power_estimate = feature_4 * feature_3 * _RPM_NM_TO_KW
+
+        # Show default recommendations right away; AI-powered ones are fetched
+        # in the background and swapped in by the result page
+        recommendations = get_default_recommendations(feature_1, feature_2, feature_3, feature_4, result,
+                                                      temp_diff=temp_diff, process_temp_c=process_temp_c)
+        job_id = None
+        if _should_query_ai(feature_1, feature_2, feature_3, feature_4):
+            job_id = _submit_ai_job(feature_1, feature_2, feature_3, feature_4, result)
         
         # Prepare additional context for the template
         context = {
-            'air_temp_c': round(feature_1 - 273.15, 1),
-            'process_temp_c': round(feature_2 - 273.15, 1),
-            'temp_diff': round(feature_2 - feature_1, 1),
-            'power_estimate': round((feature_4 * feature_3 * 2 * 3.14159) / 60000, 2)
+            'air_temp_c': round(air_temp_c, 1),
+            'process_temp_c': round(process_temp_c, 1),
+            'temp_diff': round(temp_diff, 1),
+            'power_estimate': round(power_estimate, 2)
         }
 
         # Render the result page with the prediction and recommendations
-        return render_template('result.html', 
+        return render_template(_TMPL_RESULT, 
                              prediction=prediction_text,
                              recommendations=recommendations,
+                             job_id=job_id,
                              context=context,
                              parameters={
                                  'air_temp': feature_1,
@@ -325,8 +667,34 @@ def predict():
 
     except Exception as e:
         # If an error occurs, return the error message
-        print(f"Error in predict route: {str(e)}")
+        log.error("Error in predict route: %s", e)
         return str(e)
 
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    # Expects {"samples": [[air_temp, process_temp, rotational_speed, torque], ...]}
+    payload = request.get_json(silent=True) or {}
+    try:
+        X = np.asarray(payload["samples"], dtype=np.float32)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Expected a 'samples' list of [air_temp, process_temp, rotational_speed, torque] rows"}), 400
+    if X.size == 0:
+        return jsonify([])
+    if X.ndim != 2 or X.shape[1] != 4:
+        return jsonify({"error": "Each sample must have exactly 4 values"}), 400
+    if not np.isfinite(X).all():
+        return jsonify({"error": "Sample values must be finite numbers"}), 400
+
+    return jsonify(_infer(X).astype(int).tolist())
+
+@app.route('/recommendations/<job_id>')
+def recommendations_status(job_id):
+    state = ai_cache.get(_ai_job_key(job_id))
+    if state is None:
+        return jsonify({"status": "unknown"}), 404
+    # Final states are kept until AI_JOB_TTL so a retried poll still finds them
+    return jsonify(state)
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only; see README for running under gunicorn
+    app.run(debug=os.getenv("FLASK_DEBUG") == "1")
\ No newline at end of file
@@ -0,0 +1,15 @@
+import joblib
+import numpy as np
+from skl2onnx import to_onnx
+
+# One-time conversion of the Random Forest model to ONNX for onnxruntime inference
+random_forest_model = joblib.load('random_forest_model.pkl')
+
+# Air temperature, process temperature, rotational speed, torque
+sample = np.array([[300.0, 310.0, 1500.0, 40.0]], dtype=np.float32)
+
+onx = to_onnx(random_forest_model, sample, options={'zipmap': False})
+with open('rf.onnx', 'wb') as f:
+    f.write(onx.SerializeToString())
+
+print("Saved rf.onnx")